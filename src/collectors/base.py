@@ -1,13 +1,16 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
 import json
 import logging
 import threading
 import time
 from pathlib import Path
+from typing import Callable
+from urllib.parse import urlparse
 import requests
 import urllib3
+from .converter import convert_site
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -53,15 +56,77 @@ class DownloadRecord:
             )
 
 
+class DirectRecord:
+    """记录各 host 直连的连续失败次数与平均耗时，跨次运行保存"""
+
+    def __init__(self, record_file: Path = Path("direct_stats.json")):
+        self.record_file = record_file
+        self.data: dict[str, dict[str, float]] = {}
+        self.lock = threading.RLock()
+        if record_file.exists():
+            try:
+                self.data = json.loads(record_file.read_text(encoding="utf-8"))
+            except Exception:
+                logging.warning(f"Failed to load direct record from {record_file}")
+
+    def allowed(self, host: str, max_failures: int, retry_after: float) -> bool:
+        """连续失败达到 max_failures 的 host 不再直连，超过 retry_after 秒后重新尝试"""
+        with self.lock:
+            entry = self.data.get(host, {})
+        if entry.get("failures", 0) < max_failures:
+            return True
+        return time.time() - entry.get("updated", 0) >= retry_after
+
+    def latency(self, host: str) -> float | None:
+        with self.lock:
+            return self.data.get(host, {}).get("latency")
+
+    def update(self, host: str, ok: bool, elapsed: float | None = None) -> None:
+        with self.lock:
+            entry = self.data.setdefault(host, {"failures": 0})
+            entry["updated"] = time.time()
+            if not ok:
+                entry["failures"] = entry.get("failures", 0) + 1
+                return
+            entry["failures"] = 0
+            if elapsed is not None:
+                old = entry.get("latency", elapsed)
+                entry["latency"] = (old + elapsed) / 2
+
+    def save(self):
+        with self.lock:
+            self.record_file.write_text(
+                json.dumps(self.data, indent=2), encoding="utf-8"
+            )
+
+
 class ProxyManager:
     """管理代理池并发请求"""
 
-    def __init__(self, proxies_list: list[str] | None = None):
+    # 复用已命中代理时的超时时间，超时后回退到全量竞速
+    AFFINITY_TIMEOUT = 5
+    # 直连先行时等待直连的延迟范围（秒），未有直连耗时记录时使用默认值
+    DIRECT_DELAY = 0.5
+    DIRECT_DELAY_RANGE = (0.25, 3.0)
+    # 某 host 直连连续失败达到该次数后不再尝试直连，超过重试间隔（秒）后再试一次
+    DIRECT_MAX_FAILURES = 2
+    DIRECT_RETRY_AFTER = 24 * 3600
+
+    def __init__(
+        self,
+        proxies_list: list[str] | None = None,
+        direct_first: bool = True,
+        direct_record: DirectRecord | None = None,
+    ):
         self.lock = threading.RLock()
         # 代理优先级字典，初始优先级为0，越高越优先
         self.priority = {}
+        # 站点亲和：host -> 上次成功的代理，后续请求优先复用其 keep-alive 连接
+        self.affinity: dict[str, str] = {}
+        # 直连先行（happy eyeballs）：各 host 的直连统计可跨采集器、跨运行共享
+        self.direct_first = direct_first
+        self.direct_record = direct_record or DirectRecord()
         proxies = proxies_list or []
-        # proxies.insert(0, "")
         for p in proxies:
             self.priority[p] = 0
         self.session = requests.Session()
@@ -81,30 +146,117 @@ class ProxyManager:
             raise ValueError("Empty response")
         return resp
 
+    def _direct_allowed(self, host: str) -> bool:
+        return self.direct_first and self.direct_record.allowed(
+            host, self.DIRECT_MAX_FAILURES, self.DIRECT_RETRY_AFTER
+        )
+
+    def _direct_delay(self, host: str) -> float:
+        """根据该 host 的直连平均耗时计算启动代理竞速前的等待时间"""
+        latency = self.direct_record.latency(host)
+        if latency is None:
+            return self.DIRECT_DELAY
+        low, high = self.DIRECT_DELAY_RANGE
+        return min(max(latency * 1.5, low), high)
+
+    def _mark(
+        self, host: str, proxy: str, ok: bool, elapsed: float | None = None
+    ) -> None:
+        """更新代理优先级；直连（空字符串）则更新该 host 的直连统计"""
+        if not proxy:
+            self.direct_record.update(host, ok, elapsed)
+            return
+        with self.lock:
+            self.priority[proxy] += 1 if ok else -1
+
+    def _watch_direct(
+        self, host: str, direct: Future[requests.Response], start: float
+    ) -> Callable[[], None]:
+        """
+        无论竞速谁胜出都记录直连结果。
+        返回的函数在代理胜出时调用：直连仍未完成则记为一次失败，之后的结果不再计入
+        """
+        judged = False
+
+        def on_done(f: Future[requests.Response]) -> None:
+            with self.lock:
+                if judged:
+                    return
+                ok = not f.cancelled() and f.exception() is None
+                self._mark(host, "", ok, time.time() - start)
+
+        def proxy_won() -> None:
+            nonlocal judged
+            with self.lock:
+                if not direct.done():
+                    judged = True
+                    self._mark(host, "", False)
+
+        direct.add_done_callback(on_done)
+        return proxy_won
+
+    def _fetch_sticky(self, url: str, host: str) -> requests.Response | None:
+        """优先使用该 host 上次成功的代理，失败则解除亲和并返回 None"""
+        with self.lock:
+            proxy = self.affinity.get(host)
+        if proxy is None:
+            return None
+        try:
+            resp = self._request(url, proxy, timeout=self.AFFINITY_TIMEOUT)
+        except Exception as e:
+            logging.debug(f"Sticky proxy {proxy} failed for {host}: {e}")
+            self._mark(host, proxy, False)
+            with self.lock:
+                if self.affinity.get(host) == proxy:
+                    del self.affinity[host]
+            return None
+        extralog = f"proxy: {proxy}" if proxy else "direct"
+        logging.info(f"Successfully fetched {url} with sticky {extralog}")
+        self._mark(host, proxy, True)
+        return resp
+
     def fetch_html(
         self, url: str, max_workers: int = 10, timeout: int = 30
     ) -> requests.Response:
+        host = urlparse(url).netloc
+        resp = self._fetch_sticky(url, host)
+        if resp is not None:
+            return resp
+
+        futures: dict[Future[requests.Response], str] = {}
+        start = time.time()
+        proxy_won: Callable[[], None] | None = None
+        if self._direct_allowed(host):
+            # 直连先行，在自适应延迟内未完成时再启动代理竞速
+            direct = self.executor.submit(self._request, url, "", timeout)
+            proxy_won = self._watch_direct(host, direct, start)
+            futures[direct] = ""
+            wait([direct], timeout=self._direct_delay(host))
+
         with self.lock:
             # 按优先级降序排序
             sorted_proxies = sorted(
                 self.priority.keys(), key=lambda p: -self.priority[p]
             )
-        if not sorted_proxies:
+        if not sorted_proxies and not futures:
             raise RuntimeError(f"All proxies failed to fetch {url}")
 
-        futures = {
-            self.executor.submit(self._request, url, p, timeout): p
-            for p in sorted_proxies
-        }
+        if not any(f.done() and f.exception() is None for f in futures):
+            for p in sorted_proxies:
+                futures[self.executor.submit(self._request, url, p, timeout)] = p
         for future in as_completed(futures):
             proxy = futures[future]
             try:
                 resp = future.result()
                 extralog = f"proxy: {proxy}" if proxy else "direct"
                 logging.info(f"Successfully fetched {url} with {extralog}")
-                # 成功后将该代理提前
+                # 成功后将该代理提前；直连结果由 _watch_direct 记录
+                if proxy:
+                    self._mark(host, proxy, True)
+                    if proxy_won is not None:
+                        proxy_won()
                 with self.lock:
-                    self.priority[proxy] += 1
+                    self.affinity[host] = proxy
                 # 成功后取消其他未完成任务
                 for f in futures:
                     if f != future:
@@ -113,8 +265,8 @@ class ProxyManager:
             except Exception as e:
                 logging.debug(f"Proxy {proxy} failed: {e}")
                 # 失败后将该代理后移
-                with self.lock:
-                    self.priority[proxy] -= 1
+                if proxy:
+                    self._mark(host, proxy, False)
         raise RuntimeError(f"All proxies failed to fetch {url}")
 
     def shutdown(self):
@@ -128,8 +280,13 @@ class BaseCollector(ABC):
     home_page: str
     DOWNLOAD_TIMEOUT = 20
 
-    def __init__(self, proxies_list: list[str] | None = None):
-        self.proxy_manager = ProxyManager(proxies_list)
+    def __init__(
+        self,
+        proxies_list: list[str] | None = None,
+        direct_first: bool = True,
+        direct_record: DirectRecord | None = None,
+    ):
+        self.proxy_manager = ProxyManager(proxies_list, direct_first, direct_record)
 
     # -------------------- HTML抓取 -------------------- #
     def fetch_html(self, url: str) -> str:
@@ -175,6 +332,20 @@ class BaseCollector(ABC):
             new_url[u] = ret
         return data, new_url
 
+    # -------------------- 格式转换 -------------------- #
+    def convert_files(self, urls: list[tuple[str, str]], output_dir: Path) -> None:
+        """补全站点缺失、为空或无效的 clash / v2ray 订阅"""
+        start = time.time()
+        try:
+            generated = convert_site(output_dir / self.name, {f for f, _ in urls})
+        except Exception as e:
+            logging.error(f"[{self.name}] Failed to convert subscriptions: {e}")
+            return
+        if generated:
+            logging.info(
+                f"[{self.name}] Generated {generated} took {time.time() - start:.2f}s"
+            )
+
     def run(
         self, output_dir: Path, record: DownloadRecord | None = None
     ) -> CollectorResult:
@@ -197,6 +368,7 @@ class BaseCollector(ABC):
             tried_urls = list(new_urls.keys())
             success_urls = [u for u, ok in new_urls.items() if ok]
             failed_urls = [u for u, ok in new_urls.items() if not ok]
+            self.convert_files(urls, output_dir)
             if record:
                 record.update_site(self.name, site_data)
                 record.save()
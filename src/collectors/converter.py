@@ -0,0 +1,666 @@
+import base64
+import binascii
+import codecs
+import json
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Iterator, TextIO
+from urllib.parse import parse_qs, quote, unquote, urlencode, urlsplit
+
+CLASH_FILE = "clash.yaml"
+V2RAY_FILE = "v2ray.txt"
+SUPPORTED_SCHEMES = ("vmess", "vless", "ss", "trojan")
+CHUNK_SIZE = 64 * 1024
+CLASH_HEADER = """port: 7890
+socks-port: 7891
+allow-lan: true
+mode: Rule
+log-level: info
+proxies:
+"""
+CLASH_GROUP = "节点选择"
+
+_SPACE_RE = re.compile(r" *")
+_SEPARATOR_RE = re.compile(r"[ ,]*")
+_KEY_RE = re.compile(r"([^:]+?) *:")
+_QUOTED_RE = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\']|\'\')*\'')
+# plain 标量遇到 , } ] 或 " #" 注释即结束
+_PLAIN_RE = re.compile(r"(?:[^ ,}\]]| (?!#))*")
+_COMMENT_RE = re.compile(r"(?:^| +)#.*$")
+
+
+# -------------------- base64 流式读写 -------------------- #
+def _b64decode(data: str) -> bytes:
+    data = data.strip().replace("-", "+").replace("_", "/")
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+def _iter_b64_lines(fp: TextIO) -> Iterator[str]:
+    """分块解码 base64 订阅，逐行产出"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    tail = ""
+    while True:
+        chunk = fp.read(CHUNK_SIZE)
+        data = pending + "".join(chunk.split())
+        if not chunk:
+            if data:
+                tail += decoder.decode(_b64decode(data))
+            tail += decoder.decode(b"", final=True)
+            break
+        cut = len(data) - len(data) % 4
+        pending = data[cut:]
+        text = tail + decoder.decode(_b64decode(data[:cut]))
+        *lines, tail = text.split("\n")
+        yield from lines
+    yield from tail.split("\n")
+
+
+class _B64Writer:
+    """按 3 字节对齐分块写出 base64，避免一次性编码整个文件"""
+
+    def __init__(self, fp: TextIO):
+        self.fp = fp
+        self.buffer = bytearray()
+
+    def write(self, data: bytes) -> None:
+        self.buffer += data
+        if len(self.buffer) >= CHUNK_SIZE:
+            cut = len(self.buffer) - len(self.buffer) % 3
+            self.fp.write(base64.b64encode(self.buffer[:cut]).decode())
+            del self.buffer[:cut]
+
+    def close(self) -> None:
+        self.fp.write(base64.b64encode(self.buffer).decode())
+        self.buffer.clear()
+
+
+def iter_v2ray_uris(path: Path) -> Iterator[str]:
+    """逐个产出 v2ray 订阅中的节点 URI，兼容 base64 与明文两种格式"""
+    with path.open(encoding="utf-8", errors="replace") as fp:
+        head = fp.read(256)
+        fp.seek(0)
+        if "://" in head:
+            lines: Iterator[str] = fp
+        else:
+            lines = _iter_b64_lines(fp)
+        try:
+            for line in lines:
+                line = line.strip()
+                if line.split("://", 1)[0] in SUPPORTED_SCHEMES:
+                    yield line
+        except (binascii.Error, ValueError):
+            logging.debug(f"Invalid base64 subscription: {path}")
+
+
+# -------------------- clash YAML 流式解析 -------------------- #
+def _scalar(text: str) -> Any:
+    text = text.strip()
+    if not text:
+        return ""
+    if text[0] == '"':
+        return json.loads(text) if "\\" in text else text[1:-1]
+    if text[0] == "'":
+        return text[1:-1].replace("''", "'")
+    digits = text[1:] if text[0] == "-" else text
+    if digits.isascii() and digits.isdigit():
+        return int(text)
+    lowered = text.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    if lowered in ("null", "~"):
+        return None
+    return text
+
+
+def _match(pattern: re.Pattern[str], text: str, i: int) -> re.Match[str]:
+    match = pattern.match(text, i)
+    if match is None:
+        raise ValueError(f"Unexpected flow syntax at {i}: {text[i : i + 20]!r}")
+    return match
+
+
+def _parse_flow(text: str, i: int = 0) -> tuple[Any, int]:
+    """解析单行 flow 风格的 {..} / [..]，返回 (值, 结束位置)"""
+    i = _match(_SPACE_RE, text, i).end()
+    if text[i] == "{":
+        result: dict[str, Any] = {}
+        i += 1
+        while True:
+            i = _match(_SEPARATOR_RE, text, i).end()
+            if text[i] == "}":
+                return result, i + 1
+            key = _match(_KEY_RE, text, i)
+            result[str(_scalar(key.group(1)))], i = _parse_flow(text, key.end())
+    if text[i] == "[":
+        items: list[Any] = []
+        i += 1
+        while True:
+            i = _match(_SEPARATOR_RE, text, i).end()
+            if text[i] == "]":
+                return items, i + 1
+            value, i = _parse_flow(text, i)
+            items.append(value)
+    match = _match(_QUOTED_RE if text[i] in "\"'" else _PLAIN_RE, text, i)
+    return _scalar(match.group()), match.end()
+
+
+def _parse_block(lines: list[tuple[int, str]], i: int, indent: int) -> tuple[Any, int]:
+    """解析缩进为 indent 的 block 风格映射或列表"""
+    if lines[i][1].startswith("- "):
+        items: list[Any] = []
+        while i < len(lines) and lines[i][0] == indent:
+            value = lines[i][1][2:].strip()
+            items.append(_parse_flow(value)[0] if value else None)
+            i += 1
+        return items, i
+    result: dict[str, Any] = {}
+    while i < len(lines) and lines[i][0] == indent:
+        key, _, rest = lines[i][1].partition(":")
+        rest = rest.strip()
+        i += 1
+        if rest and rest[0] in "{[\"'":
+            result[str(_scalar(key))] = _parse_flow(rest)[0]
+        elif rest := _COMMENT_RE.sub("", rest):
+            # block 上下文的 plain 标量可以包含逗号，只需去掉行尾注释
+            result[str(_scalar(key))] = _scalar(rest)
+        elif i < len(lines) and lines[i][0] > indent:
+            result[str(_scalar(key))], i = _parse_block(lines, i, lines[i][0])
+        elif i < len(lines) and lines[i][0] == indent and lines[i][1][:2] == "- ":
+            result[str(_scalar(key))], i = _parse_block(lines, i, indent)
+        else:
+            result[str(_scalar(key))] = None
+    return result, i
+
+
+def _parse_item(lines: list[tuple[int, str]]) -> dict[str, Any] | None:
+    indent, first = lines[0]
+    body = first[2:].strip()
+    try:
+        if body.startswith("{"):
+            value = _parse_flow(body)[0]
+        else:
+            value = _parse_block([(indent + 2, body)] + lines[1:], 0, indent + 2)[0]
+    except (IndexError, ValueError):
+        logging.debug(f"Failed to parse clash proxy: {first}")
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def iter_clash_proxies(path: Path) -> Iterator[dict[str, Any]]:
+    """逐个产出 clash 配置 proxies 段中的节点，不加载整个文件"""
+    in_proxies = False
+    item: list[tuple[int, str]] = []
+    item_indent = -1
+    with path.open(encoding="utf-8", errors="replace") as fp:
+        for raw in fp:
+            line = raw.rstrip("\r\n")
+            content = line.lstrip(" ")
+            if not content or content.startswith("#"):
+                continue
+            indent = len(line) - len(content)
+            if not in_proxies:
+                header = _COMMENT_RE.sub("", content).rstrip()
+                in_proxies = indent == 0 and header == "proxies:"
+                continue
+            if indent == 0 and not content.startswith("- "):
+                break
+            if content.startswith("- ") and (item_indent < 0 or indent == item_indent):
+                if item and (proxy := _parse_item(item)):
+                    yield proxy
+                item_indent = indent
+                item = []
+            item.append((indent, content))
+    if item and (proxy := _parse_item(item)):
+        yield proxy
+
+
+def _yaml_value(value: Any) -> str:
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{k}: {_yaml_value(v)}" for k, v in value.items()) + "}"
+    if isinstance(value, list):
+        return "[" + ", ".join(_yaml_value(v) for v in value) + "]"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    return json.dumps(str(value), ensure_ascii=False)
+
+
+# -------------------- URI <-> clash 节点 -------------------- #
+def _netloc(host: str, port: Any) -> str:
+    return f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+
+
+def _transport_to_clash(proxy: dict[str, Any], params: dict[str, str]) -> None:
+    network = params.get("type") or params.get("net") or "tcp"
+    if network == "tcp":
+        return
+    proxy["network"] = network
+    if network == "ws":
+        opts: dict[str, Any] = {"path": params.get("path") or "/"}
+        if params.get("host"):
+            opts["headers"] = {"Host": params["host"]}
+        proxy["ws-opts"] = opts
+    elif network == "grpc":
+        name = params.get("serviceName") or params.get("path") or ""
+        proxy["grpc-opts"] = {"grpc-service-name": name}
+    elif network in ("h2", "http"):
+        proxy["h2-opts"] = {
+            "host": [params.get("host", "")],
+            "path": params.get("path") or "/",
+        }
+
+
+def _mapping(value: Any, field: str) -> dict[str, Any]:
+    """读取 *-opts 这类映射字段，缺省为空，类型不符时抛出 ValueError"""
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise ValueError(f"{field} should be a mapping, got {value!r}")
+    return value
+
+
+def _transport_from_clash(proxy: dict[str, Any]) -> dict[str, str]:
+    network = proxy.get("network") or "tcp"
+    params = {"type": network}
+    if network == "ws":
+        opts = _mapping(proxy.get("ws-opts"), "ws-opts")
+        headers = _mapping(opts.get("headers"), "ws-opts.headers")
+        params["path"] = opts.get("path") or "/"
+        host = headers.get("Host") or headers.get("host")
+        if host:
+            params["host"] = host
+    elif network == "grpc":
+        params["serviceName"] = _mapping(proxy.get("grpc-opts"), "grpc-opts").get(
+            "grpc-service-name", ""
+        )
+    elif network in ("h2", "http"):
+        opts = _mapping(proxy.get("h2-opts"), "h2-opts")
+        hosts = opts.get("host") or []
+        params["path"] = opts.get("path") or "/"
+        if hosts:
+            params["host"] = hosts[0]
+    return params
+
+
+def _vmess_to_clash(body: str) -> dict[str, Any]:
+    data = json.loads(_b64decode(body))
+    if not isinstance(data, dict):
+        raise ValueError("vmess payload should be a JSON object")
+    params = {k: str(v) for k, v in data.items() if v not in (None, "")}
+    # vmess 的 type 字段是伪装类型，传输方式在 net 字段
+    params["type"] = params.get("net", "tcp")
+    proxy: dict[str, Any] = {
+        "name": data.get("ps") or data["add"],
+        "type": "vmess",
+        "server": data["add"],
+        "port": int(data["port"]),
+        "uuid": data["id"],
+        "alterId": int(data.get("aid") or 0),
+        "cipher": data.get("scy") or "auto",
+        "tls": data.get("tls") == "tls",
+    }
+    if data.get("sni"):
+        proxy["servername"] = data["sni"]
+    _transport_to_clash(proxy, params)
+    return proxy
+
+
+def _vmess_from_clash(proxy: dict[str, Any]) -> str:
+    params = _transport_from_clash(proxy)
+    data = {
+        "v": "2",
+        "ps": str(proxy.get("name", "")),
+        "add": proxy["server"],
+        "port": str(proxy["port"]),
+        "id": proxy["uuid"],
+        "aid": str(proxy.get("alterId", 0)),
+        "scy": proxy.get("cipher", "auto"),
+        "net": params["type"],
+        "type": "none",
+        "host": params.get("host", ""),
+        "path": params.get("path") or params.get("serviceName", ""),
+        "tls": "tls" if proxy.get("tls") else "",
+        "sni": proxy.get("servername", ""),
+    }
+    body = json.dumps(data, ensure_ascii=False).encode()
+    return "vmess://" + base64.b64encode(body).decode()
+
+
+def _url_to_clash(kind: str, uri: str) -> dict[str, Any]:
+    """解析 vless / trojan 这类 user@host:port?query#name 形式的 URI"""
+    parts = urlsplit(uri)
+    params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+    proxy: dict[str, Any] = {
+        "name": unquote(parts.fragment) or parts.hostname,
+        "type": kind,
+        "server": parts.hostname,
+        "port": parts.port,
+    }
+    user = unquote(parts.username or "")
+    insecure = params.get("allowInsecure") == "1" or params.get("insecure") == "1"
+    if kind == "vless":
+        security = params.get("security", "none")
+        proxy.update(uuid=user, udp=True, tls=security in ("tls", "reality"))
+        if params.get("sni"):
+            proxy["servername"] = params["sni"]
+        if params.get("flow"):
+            proxy["flow"] = params["flow"]
+        if params.get("fp"):
+            proxy["client-fingerprint"] = params["fp"]
+        if security == "reality":
+            proxy["reality-opts"] = {
+                "public-key": params.get("pbk", ""),
+                "short-id": params.get("sid", ""),
+            }
+    else:
+        proxy["password"] = user
+        if params.get("sni") or params.get("peer"):
+            proxy["sni"] = params.get("sni") or params.get("peer")
+    if insecure:
+        proxy["skip-cert-verify"] = True
+    _transport_to_clash(proxy, params)
+    return proxy
+
+
+def _url_from_clash(proxy: dict[str, Any]) -> str:
+    kind = proxy["type"]
+    params = _transport_from_clash(proxy)
+    if kind == "vless":
+        user = proxy["uuid"]
+        reality = _mapping(proxy.get("reality-opts"), "reality-opts")
+        params["encryption"] = "none"
+        params["security"] = (
+            "reality" if reality else "tls" if proxy.get("tls") else "none"
+        )
+        if proxy.get("servername"):
+            params["sni"] = proxy["servername"]
+        if proxy.get("flow"):
+            params["flow"] = proxy["flow"]
+        if proxy.get("client-fingerprint"):
+            params["fp"] = proxy["client-fingerprint"]
+        if reality:
+            params["pbk"] = reality.get("public-key", "")
+            params["sid"] = reality.get("short-id", "")
+    else:
+        user = str(proxy["password"])
+        params["security"] = "tls"
+        if proxy.get("sni"):
+            params["sni"] = proxy["sni"]
+    if proxy.get("skip-cert-verify"):
+        params["allowInsecure"] = "1"
+    netloc = _netloc(proxy["server"], proxy["port"])
+    query = urlencode(params, quote_via=quote)
+    name = quote(str(proxy.get("name", "")))
+    return f"{kind}://{quote(user, safe='')}@{netloc}?{query}#{name}"
+
+
+def _ss_to_clash(uri: str) -> dict[str, Any] | None:
+    body, _, name = uri[len("ss://") :].partition("#")
+    body, _, query = body.partition("?")
+    body = body.rstrip("/")
+    # 插件参数无法可靠映射，跳过而不是生成无法连接的节点
+    if "plugin" in parse_qs(query):
+        logging.debug(f"Skipping ss node with plugin: {unquote(name)}")
+        return None
+    if "@" in body:
+        userinfo, _, server = body.rpartition("@")
+        userinfo = unquote(userinfo)
+        if ":" not in userinfo:
+            userinfo = _b64decode(userinfo).decode()
+    else:
+        userinfo, _, server = _b64decode(body).decode().rpartition("@")
+    cipher, _, password = userinfo.partition(":")
+    parts = urlsplit(f"//{server}")
+    return {
+        "name": unquote(name) or parts.hostname,
+        "type": "ss",
+        "server": parts.hostname,
+        "port": parts.port,
+        "cipher": cipher,
+        "password": password,
+    }
+
+
+def _ss_from_clash(proxy: dict[str, Any]) -> str | None:
+    if proxy.get("plugin"):
+        logging.debug(f"Skipping ss node with plugin: {proxy.get('name')}")
+        return None
+    userinfo = f"{proxy['cipher']}:{proxy['password']}".encode()
+    user = base64.urlsafe_b64encode(userinfo).decode().rstrip("=")
+    netloc = _netloc(proxy["server"], proxy["port"])
+    return f"ss://{user}@{netloc}#{quote(str(proxy.get('name', '')))}"
+
+
+def uri_to_clash(uri: str) -> dict[str, Any] | None:
+    """v2ray 节点 URI 转 clash 节点，不支持或格式错误时返回 None"""
+    scheme, _, body = uri.partition("://")
+    try:
+        if scheme == "vmess":
+            proxy = _vmess_to_clash(body)
+        elif scheme in ("vless", "trojan"):
+            proxy = _url_to_clash(scheme, uri)
+        elif scheme == "ss":
+            ss_proxy = _ss_to_clash(uri)
+            if ss_proxy is None:
+                return None
+            proxy = ss_proxy
+        else:
+            return None
+    except (
+        AttributeError,
+        KeyError,
+        ValueError,
+        TypeError,
+        binascii.Error,
+        UnicodeDecodeError,
+    ):
+        logging.debug(f"Failed to convert uri: {uri[:64]}")
+        return None
+    return proxy if proxy["server"] and proxy["port"] else None
+
+
+def clash_to_uri(proxy: dict[str, Any]) -> str | None:
+    """clash 节点转 v2ray 节点 URI，不支持或格式错误时返回 None"""
+    kind = proxy.get("type")
+    port = proxy.get("port")
+    if not isinstance(port, int) or isinstance(port, bool) or not 0 < port < 65536:
+        logging.debug(f"Invalid port {port!r} for clash proxy: {proxy.get('name')}")
+        return None
+    if not isinstance(proxy.get("server"), str):
+        logging.debug(f"Invalid server for clash proxy: {proxy.get('name')}")
+        return None
+    try:
+        if kind == "vmess":
+            return _vmess_from_clash(proxy)
+        if kind in ("vless", "trojan"):
+            return _url_from_clash(proxy)
+        if kind == "ss":
+            return _ss_from_clash(proxy)
+    except (AttributeError, KeyError, ValueError, TypeError):
+        logging.debug(f"Failed to convert clash proxy: {proxy.get('name')}")
+    return None
+
+
+# -------------------- 文件转换 -------------------- #
+def _atomic_output(path: Path) -> tuple[TextIO, str]:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    return os.fdopen(fd, "w", encoding="utf-8", newline="\n"), tmp
+
+
+def v2ray_to_clash(src: Path, dst: Path) -> int:
+    """v2ray 订阅转 clash 配置，返回写出的节点数"""
+    count = 0
+    names: set[str] = set()
+    out, tmp = _atomic_output(dst)
+    try:
+        with out, tempfile.TemporaryFile("w+", encoding="utf-8") as group:
+            out.write(CLASH_HEADER)
+            for uri in iter_v2ray_uris(src):
+                proxy = uri_to_clash(uri)
+                if proxy is None:
+                    continue
+                # clash 要求节点名唯一
+                name = base = str(proxy["name"])
+                suffix = 1
+                while name in names:
+                    suffix += 1
+                    name = f"{base}_{suffix}"
+                names.add(name)
+                proxy["name"] = name
+                out.write(f"  - {_yaml_value(proxy)}\n")
+                group.write(f"      - {_yaml_value(name)}\n")
+                count += 1
+            out.write(
+                f"proxy-groups:\n  - name: {CLASH_GROUP}\n"
+                f"    type: select\n    proxies:\n"
+            )
+            group.seek(0)
+            while chunk := group.read(CHUNK_SIZE):
+                out.write(chunk)
+            out.write(f"rules:\n  - MATCH,{CLASH_GROUP}\n")
+        if count:
+            os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return count
+
+
+def clash_to_v2ray(src: Path, dst: Path) -> int:
+    """clash 配置转 base64 v2ray 订阅，返回写出的节点数"""
+    count = 0
+    out, tmp = _atomic_output(dst)
+    try:
+        with out:
+            writer = _B64Writer(out)
+            for proxy in iter_clash_proxies(src):
+                uri = clash_to_uri(proxy)
+                if uri is None:
+                    continue
+                writer.write(f"{uri}\n".encode())
+                count += 1
+            writer.close()
+        if count:
+            os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return count
+
+
+def has_nodes(path: Path) -> bool:
+    """判断订阅文件是否存在且至少包含一个可用节点"""
+    if not path.exists():
+        return False
+    if path.name == CLASH_FILE:
+        return any(True for _ in iter_clash_proxies(path))
+    return any(uri_to_clash(uri) for uri in iter_v2ray_uris(path))
+
+
+def is_blank(path: Path) -> bool:
+    """判断文件是否不存在或只包含空白字符"""
+    if not path.exists():
+        return True
+    with path.open(encoding="utf-8", errors="replace") as fp:
+        while chunk := fp.read(CHUNK_SIZE):
+            if not chunk.isspace():
+                return False
+    return True
+
+
+def convert_site(site_dir: Path, provided: set[str] | None = None) -> list[str]:
+    """
+    为站点补全缺失或为空的订阅格式。
+    provided 为站点本次提供的文件名：其中的文件只有缺失或为空时才会被替换，
+    不在其中的格式视为派生文件总是重新生成。返回生成的文件名列表
+    """
+    provided = provided if provided is not None else {CLASH_FILE, V2RAY_FILE}
+    pairs = [
+        (V2RAY_FILE, CLASH_FILE, v2ray_to_clash),
+        (CLASH_FILE, V2RAY_FILE, clash_to_v2ray),
+    ]
+    generated: list[str] = []
+    for src_name, dst_name, convert in pairs:
+        src, dst = site_dir / src_name, site_dir / dst_name
+        if dst_name in provided and not is_blank(dst):
+            continue
+        if src_name not in provided or not has_nodes(src):
+            continue
+        count = convert(src, dst)
+        if count:
+            logging.info(f"Converted {src} -> {dst}: {count} nodes")
+            generated.append(dst_name)
+    return generated
+
+
+# -------------------- 基准测试 -------------------- #
+def _bench_uris(count: int) -> Iterator[str]:
+    """生成 count 个覆盖四种协议的合成节点"""
+    for i in range(count):
+        host = f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"
+        uuid = f"00000000-0000-4000-8000-{i:012d}"
+        kind = i % 4
+        if kind == 0:
+            data = {"v": "2", "ps": f"vmess-{i}", "add": host, "port": "443"}
+            data.update(id=uuid, aid="0", net="ws", path="/ws", host="a.com")
+            yield "vmess://" + base64.b64encode(json.dumps(data).encode()).decode()
+        elif kind == 1:
+            query = "encryption=none&security=tls&sni=a.com&type=ws&path=%2F"
+            yield f"vless://{uuid}@{host}:443?{query}#vless-{i}"
+        elif kind == 2:
+            user = base64.urlsafe_b64encode(b"aes-256-gcm:pass").decode()
+            yield f"ss://{user.rstrip('=')}@{host}:8388#ss-{i}"
+        else:
+            yield f"trojan://pass{i}@{host}:443?sni=a.com#trojan-{i}"
+
+
+def _bench(count: int) -> None:
+    import time
+    import tracemalloc
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / V2RAY_FILE
+        with src.open("w", encoding="utf-8") as fp:
+            writer = _B64Writer(fp)
+            for uri in _bench_uris(count):
+                writer.write(f"{uri}\n".encode())
+            writer.close()
+        steps = [
+            ("v2ray -> clash", v2ray_to_clash, src, Path(tmp) / CLASH_FILE),
+            ("clash -> v2ray", clash_to_v2ray, Path(tmp) / CLASH_FILE, src),
+        ]
+        for label, convert, s, d in steps:
+            size = s.stat().st_size
+            # 计时与内存分开测量，tracemalloc 会显著拖慢转换
+            start = time.perf_counter()
+            nodes = convert(s, d)
+            elapsed = time.perf_counter() - start
+            tracemalloc.start()
+            convert(s, d)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(
+                f"{label}: {nodes} nodes, {size / 1e6:.1f} MB in {elapsed:.2f}s, "
+                f"{nodes / elapsed:.0f} nodes/s, peak {peak / 1e6:.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Subscription converter")
+    parser.add_argument("site_dir", nargs="?", type=Path, help="Site output dir")
+    parser.add_argument("--bench", type=int, help="Benchmark with N nodes")
+    args = parser.parse_args()
+    if args.bench:
+        _bench(args.bench)
+    elif args.site_dir:
+        logging.basicConfig(level=logging.INFO)
+        print(convert_site(args.site_dir))
+    else:
+        parser.print_help()
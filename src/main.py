@@ -1,9 +1,16 @@
 import argparse
 import datetime
+import json
 import logging
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+import queue
 import random
+import socket
+import statistics
+import threading
+import time
+from urllib.parse import urlparse
 import requests
 from tabulate import tabulate
 from tqdm import tqdm
@@ -11,6 +18,7 @@ from tqdm import tqdm
 
 from collectors.base import (
     CollectorResult,
+    DirectRecord,
     DownloadRecord,
     get_collector,
     list_collectors,
@@ -19,6 +27,8 @@ from collectors.base import (
 OUTPUT_DIR = Path("../dist/")
 RECORD_FILE = OUTPUT_DIR / "downloaded.json"
 REPORT_FILE = OUTPUT_DIR / "report.txt"
+PROXY_STATS_FILE = OUTPUT_DIR / "proxy_stats.json"
+DIRECT_RECORD_FILE = OUTPUT_DIR / "direct_stats.json"
 README_FILE = Path("../README.md")
 GITHUB_PROXY = "https://ghproxy.net"
 PROXY_URLS = [
@@ -31,6 +41,19 @@ PROXY_URLS = [
 ]
 TEST_URL = "http://httpbin.org/ip"
 MAX_AVAILABLE_PROXIES = 50
+# 代理检测漏斗：TCP 连接 -> SOCKS5 握手 -> 完整 HTTP 请求，逐级变贵
+# 每级 (并发数, 超时秒数)
+PROXY_CHECK_STAGES = {
+    "tcp": (200, 1.5),
+    "socks5": (100, 3),
+    "http": (20, 5),
+}
+# 每轮从所有代理源抽取的候选总数，以及每个源的最少探索数量
+PROXY_SAMPLE_BUDGET = 3000
+PROXY_SAMPLE_MIN = 100
+# 历史统计的衰减系数与过期时间（秒），过期越久越接近先验
+PROXY_STATS_DECAY = 0.5
+PROXY_STATS_TTL = 24 * 3600
 
 
 logging.basicConfig(
@@ -38,6 +61,96 @@ logging.basicConfig(
 )
 
 
+class ProxySourceStats:
+    """记录各代理源的历史可用率、延迟与更新时间，用于按源分配抽样数量"""
+
+    def __init__(self, stats_file: Path = Path("proxy_stats.json")):
+        self.stats_file = stats_file
+        self.data: dict[str, dict[str, float]] = {}
+        self.lock = threading.RLock()
+        if stats_file.exists():
+            try:
+                self.data = json.loads(stats_file.read_text(encoding="utf-8"))
+            except Exception:
+                logging.warning(f"Failed to load proxy stats from {stats_file}")
+
+    def _decayed(self, source: str) -> tuple[float, float]:
+        """返回按新鲜度衰减后的 (tested, alive)"""
+        entry = self.data.get(source)
+        if not entry:
+            return 0.0, 0.0
+        age = max(0.0, time.time() - entry.get("updated", 0.0))
+        factor = PROXY_STATS_DECAY ** (age / PROXY_STATS_TTL)
+        return entry.get("tested", 0.0) * factor, entry.get("alive", 0.0) * factor
+
+    def latency_prior(self) -> float:
+        """无延迟记录的源使用已有记录源的平均延迟，避免未知源反而不受延迟折算"""
+        with self.lock:
+            known = [e["latency"] for e in self.data.values() if "latency" in e]
+        return statistics.mean(known) if known else 0.0
+
+    def weight(self, source: str, latency_prior: float | None = None) -> float:
+        """Thompson 采样：可用率后验抽样，再按延迟折算"""
+        if latency_prior is None:
+            latency_prior = self.latency_prior()
+        with self.lock:
+            tested, alive = self._decayed(source)
+            latency = self.data.get(source, {}).get("latency", latency_prior)
+        score = random.betavariate(alive + 1, tested - alive + 1)
+        return score / (1 + latency)
+
+    def allocate(self, pools: dict[str, list[str]], budget: int) -> dict[str, int]:
+        """根据各源权重分配抽样数量，每个源至少保留 PROXY_SAMPLE_MIN 个用于探索"""
+        sizes = {s: min(PROXY_SAMPLE_MIN, len(p)) for s, p in pools.items()}
+        prior = self.latency_prior()
+        weights = {s: self.weight(s, prior) for s in pools}
+        remaining = budget - sum(sizes.values())
+        while remaining > 0:
+            open_sources = {
+                s: w for s, w in weights.items() if sizes[s] < len(pools[s])
+            }
+            total = sum(open_sources.values())
+            if not open_sources or total <= 0:
+                break
+            assigned = 0
+            for s, w in open_sources.items():
+                extra = min(int(remaining * w / total), len(pools[s]) - sizes[s])
+                sizes[s] += extra
+                assigned += extra
+            if assigned == 0:
+                # 剩余不足以按比例分配时交给权重最高的源
+                best = max(open_sources, key=lambda s: open_sources[s])
+                sizes[best] += 1
+                assigned = 1
+            remaining -= assigned
+        return sizes
+
+    def update_source(self, source: str, tested: int, latencies: list[float]) -> None:
+        if tested == 0:
+            return
+        with self.lock:
+            old_tested, old_alive = self._decayed(source)
+            old_latency = self.data.get(source, {}).get("latency")
+            latency = statistics.median(latencies) if latencies else old_latency
+            if latency is not None and old_latency is not None:
+                latency = (latency + old_latency) / 2
+            entry = {
+                "tested": old_tested * PROXY_STATS_DECAY + tested,
+                "alive": old_alive * PROXY_STATS_DECAY + len(latencies),
+                "updated": time.time(),
+            }
+            # 从未有可用代理的源不记录延迟，由 latency_prior 兜底
+            if latency is not None:
+                entry["latency"] = latency
+            self.data[source] = entry
+
+    def save(self):
+        with self.lock:
+            self.stats_file.write_text(
+                json.dumps(self.data, indent=2), encoding="utf-8"
+            )
+
+
 def test_proxy_head(url: str, proxy: str, timeout: int = 5) -> bool:
     session = requests.Session()
     session.verify = False
@@ -50,45 +163,138 @@ def test_proxy_head(url: str, proxy: str, timeout: int = 5) -> bool:
         return False
 
 
-def check_proxy(proxies: list[str]) -> list[str]:
+def test_proxy_tcp(proxy: str, timeout: float = 1.5) -> bool:
+    """第一级：仅建立 TCP 连接"""
+    parsed = urlparse(proxy)
+    try:
+        with socket.create_connection((parsed.hostname, parsed.port), timeout):
+            return True
+    except Exception:
+        return False
+
+
+def test_proxy_socks5(proxy: str, timeout: float = 3) -> bool:
+    """第二级：仅完成 SOCKS5 问候，要求代理接受无认证方式"""
+    parsed = urlparse(proxy)
+    try:
+        with socket.create_connection((parsed.hostname, parsed.port), timeout) as sock:
+            sock.settimeout(timeout)
+            sock.sendall(b"\x05\x01\x00")
+            return sock.recv(2) == b"\x05\x00"
+    except Exception:
+        return False
+
+
+def timed_proxy_head(url: str, proxy: str, timeout: int = 5) -> float | None:
+    """第三级：完整 HTTP 检测，可用时返回耗时（秒）"""
+    start = time.time()
+    if test_proxy_head(url, proxy, timeout):
+        return time.time() - start
+    return None
+
+
+def check_proxy(
+    proxies: list[str],
+    latencies: dict[str, float | None] | None = None,
+    test_url: str = TEST_URL,
+) -> list[str]:
+    """
+    按漏斗逐级检测代理可用性，每级独立并发，前一级通过后才进入下一级。
+    可选记录每个已完成检测的代理耗时（失败为 None）
+    """
     available_proxies: list[str] = []
     total = len(proxies)
-    with ThreadPoolExecutor(max_workers=20) as executor:
-        futures = {executor.submit(test_proxy_head, TEST_URL, p): p for p in proxies}
-        with tqdm(
-            total=total,
-            desc="Proxy Checking",
-            unit="proxy",
-        ) as pbar:
-            for future in as_completed(futures):
-                proxy = futures[future]
-                try:
-                    future.result()
-                    available_proxies.append(proxy)
-                    if len(available_proxies) >= MAX_AVAILABLE_PROXIES:
-                        for f in futures:
-                            if not f.done():
-                                f.cancel()
-                        break
-                except Exception:
-                    logging.debug(f"Proxy failed: {proxy}")
-                pbar.update(1)
-                pbar.set_postfix(
-                    {
-                        "Available": len(available_proxies),
-                        "Checked": f"{pbar.n}/{total}",
-                    }
-                )
-
+    stage_names = list(PROXY_CHECK_STAGES)
+    passed = {name: 0 for name in stage_names}
+    entered = {name: 0 for name in stage_names}
+    executors = {
+        name: ThreadPoolExecutor(max_workers=workers)
+        for name, (workers, _) in PROXY_CHECK_STAGES.items()
+    }
+    checks = {
+        "tcp": lambda p, t: test_proxy_tcp(p, t) or None,
+        "socks5": lambda p, t: test_proxy_socks5(p, t) or None,
+        "http": lambda p, t: timed_proxy_head(test_url, p, t),
+    }
+    results: queue.Queue[tuple[str, float | None]] = queue.Queue()
+    stop = threading.Event()
+    lock = threading.Lock()
+
+    def submit(index: int, proxy: str) -> None:
+        name = stage_names[index]
+        # stop 与 shutdown 之间不能再提交任务，检查与提交需在同一把锁内完成
+        with lock:
+            if stop.is_set():
+                return
+            entered[name] += 1
+            future = executors[name].submit(
+                checks[name], proxy, PROXY_CHECK_STAGES[name][1]
+            )
+        future.add_done_callback(lambda f: advance(index, proxy, f))
+
+    def advance(index: int, proxy: str, future: Future) -> None:
+        if future.cancelled():
+            return
+        try:
+            value = future.result()
+        except Exception:
+            value = None
+        if value is None:
+            results.put((proxy, None))
+            return
+        with lock:
+            passed[stage_names[index]] += 1
+        if index + 1 < len(stage_names):
+            submit(index + 1, proxy)
+        else:
+            results.put((proxy, value))
+
+    for p in proxies:
+        submit(0, p)
+
+    with tqdm(
+        total=total,
+        desc="Proxy Checking",
+        unit="proxy",
+    ) as pbar:
+        for _ in range(total):
+            proxy, latency = results.get()
+            if latencies is not None:
+                latencies[proxy] = latency
+            if latency is None:
+                logging.debug(f"Proxy failed: {proxy}")
+            else:
+                available_proxies.append(proxy)
+            pbar.update(1)
+            pbar.set_postfix(
+                {
+                    "Available": len(available_proxies),
+                    "Checked": f"{pbar.n}/{total}",
+                }
+            )
+            if len(available_proxies) >= MAX_AVAILABLE_PROXIES:
+                break
+
+    with lock:
+        stop.set()
+    for executor in executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    with lock:
+        for name in stage_names:
+            logging.info(
+                f"Proxy check stage {name}: {passed[name]} / {entered[name]} passed"
+            )
     logging.info(f"Get avaliable Proxy: {len(available_proxies)}")
     return available_proxies
 
 
-def get_proxy_list() -> list[str]:
-    proxies = []
+def get_proxy_list(
+    stats: ProxySourceStats | None = None, test_url: str = TEST_URL
+) -> list[str]:
+    stats = stats or ProxySourceStats(PROXY_STATS_FILE)
+    pools: dict[str, list[str]] = {}
     for PROXY_URL in PROXY_URLS:
-        PROXY_URL = f"{GITHUB_PROXY}/{PROXY_URL}"
-        resp = requests.get(PROXY_URL, timeout=30)
+        resp = requests.get(f"{GITHUB_PROXY}/{PROXY_URL}", timeout=30)
         resp.raise_for_status()
         proxy = [
             f"socks5h://{line.strip()}"
@@ -96,18 +302,39 @@ def get_proxy_list() -> list[str]:
             if line.strip()
         ]
         logging.info(f"Fetching proxies from: {PROXY_URL}, {len(proxy)}")
-        proxies.extend(random.sample(proxy, min(500, len(proxy))))
-    proxies = list(set(proxies))
+        pools[PROXY_URL] = list(set(proxy))
+
+    # 按来源统计分配抽样数量，多个源同时抽中的代理计入每一个源
+    sizes = stats.allocate(pools, PROXY_SAMPLE_BUDGET)
+    sources_of: dict[str, list[str]] = {}
+    for source, pool in pools.items():
+        logging.info(f"Sampling {sizes[source]} proxies from: {source}")
+        for p in random.sample(pool, sizes[source]):
+            sources_of.setdefault(p, []).append(source)
+    proxies = list(sources_of)
+    random.shuffle(proxies)
     logging.info(f"Get All Proxy: {len(proxies)}")
-    return check_proxy(proxies)
+
+    latencies: dict[str, float | None] = {}
+    available = check_proxy(proxies, latencies, test_url)
+    for source in pools:
+        results = [v for p, v in latencies.items() if source in sources_of[p]]
+        stats.update_source(source, len(results), [v for v in results if v is not None])
+    stats.save()
+    return available
 
 
 def run_collector(
-    collector_name: str, proxy_list: list[str], output_dir: Path, record: DownloadRecord
+    collector_name: str,
+    proxy_list: list[str],
+    output_dir: Path,
+    record: DownloadRecord,
+    direct_first: bool = True,
+    direct_record: DirectRecord | None = None,
 ):
     """运行单个采集器"""
     collector_cls = get_collector(collector_name)
-    collector = collector_cls(proxy_list)
+    collector = collector_cls(proxy_list, direct_first, direct_record)
     return collector.run(output_dir, record)
 
 
@@ -199,7 +426,18 @@ def main():
         default=4,
         help="Number of threads for concurrent collectors",
     )
+    parser.add_argument(
+        "--test-url",
+        default=TEST_URL,
+        help="URL requested through each proxy in the final validation stage",
+    )
+    parser.add_argument(
+        "--no-direct",
+        action="store_true",
+        help="Disable direct-first connections and always go through proxies",
+    )
     record = DownloadRecord(RECORD_FILE)
+    direct_record = DirectRecord(DIRECT_RECORD_FILE)
     args = parser.parse_args()
     if args.list:
         print("Supported collectors:")
@@ -215,7 +453,7 @@ def main():
 
     logging.info(f"Collectors to run: {collectors_to_run}")
 
-    proxy_list = get_proxy_list()
+    proxy_list = get_proxy_list(test_url=args.test_url)
 
     logging.info(f"Get avaliable proxy: {len(proxy_list)}")
 
@@ -223,7 +461,15 @@ def main():
     results = []
     with ThreadPoolExecutor(max_workers=args.workers) as executor:
         futures = {
-            executor.submit(run_collector, name, proxy_list, OUTPUT_DIR, record): name
+            executor.submit(
+                run_collector,
+                name,
+                proxy_list,
+                OUTPUT_DIR,
+                record,
+                not args.no_direct,
+                direct_record,
+            ): name
             for name in collectors_to_run
         }
         for future in as_completed(futures):
@@ -240,6 +486,7 @@ def main():
                         "result": "failed",
                     }
                 )
+    direct_record.save()
     write_download_report(results, REPORT_FILE)
     update_readme(OUTPUT_DIR, README_FILE, GITHUB_PROXY)
 
@@ -0,0 +1,186 @@
+import base64
+import tempfile
+import unittest
+from pathlib import Path
+
+from collectors.converter import (
+    CLASH_FILE,
+    V2RAY_FILE,
+    clash_to_uri,
+    clash_to_v2ray,
+    convert_site,
+    iter_clash_proxies,
+    iter_v2ray_uris,
+    uri_to_clash,
+    v2ray_to_clash,
+)
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+KEY_FIELDS = (
+    "type",
+    "server",
+    "port",
+    "uuid",
+    "password",
+    "cipher",
+    "tls",
+    "servername",
+    "sni",
+    "flow",
+    "network",
+    "ws-opts",
+    "grpc-opts",
+    "reality-opts",
+)
+
+
+def key_fields(proxy: dict) -> dict:
+    return {k: proxy.get(k) for k in KEY_FIELDS}
+
+
+class TestFixtures(unittest.TestCase):
+    """基于 tests/fixtures 下固定样例做往返转换检查"""
+
+    CLASH_NODES = 6
+    V2RAY_NODES = 7
+
+    def test_clash_parse(self):
+        proxies = list(iter_clash_proxies(FIXTURES / CLASH_FILE))
+        self.assertEqual(len(proxies), self.CLASH_NODES)
+        by_name = {p["name"]: p for p in proxies}
+        self.assertEqual(by_name["ss-v6"]["server"], "2001:db8::1")
+        self.assertEqual(by_name["trojan, quoted"]["password"], "p@ss:word")
+        self.assertEqual(
+            by_name["vless-reality"]["reality-opts"],
+            {"public-key": "pubkey123", "short-id": "ab12"},
+        )
+        self.assertEqual(
+            by_name["vless-ws-block"]["ws-opts"],
+            {"path": "/?ed=2560", "headers": {"Host": "v.example.com"}},
+        )
+
+    def test_clash_round_trip(self):
+        for proxy in iter_clash_proxies(FIXTURES / CLASH_FILE):
+            with self.subTest(name=proxy["name"]):
+                uri = clash_to_uri(proxy)
+                self.assertIsNotNone(uri)
+                back = uri_to_clash(uri)
+                self.assertIsNotNone(back, uri)
+                self.assertEqual(back["name"], proxy["name"])
+                self.assertEqual(key_fields(back), key_fields(proxy))
+
+    def test_v2ray_round_trip(self):
+        uris = list(iter_v2ray_uris(FIXTURES / V2RAY_FILE))
+        self.assertEqual(len(uris), self.V2RAY_NODES)
+        for uri in uris:
+            with self.subTest(uri=uri):
+                proxy = uri_to_clash(uri)
+                self.assertIsNotNone(proxy)
+                again = clash_to_uri(proxy)
+                self.assertIsNotNone(again)
+                self.assertEqual(uri_to_clash(again), proxy)
+
+    def test_v2ray_base64(self):
+        plain = (FIXTURES / V2RAY_FILE).read_bytes()
+        with tempfile.TemporaryDirectory() as tmp:
+            encoded = Path(tmp) / V2RAY_FILE
+            encoded.write_bytes(base64.b64encode(plain))
+            self.assertEqual(
+                list(iter_v2ray_uris(encoded)),
+                list(iter_v2ray_uris(FIXTURES / V2RAY_FILE)),
+            )
+
+    def test_file_round_trip(self):
+        expected = [key_fields(p) for p in iter_clash_proxies(FIXTURES / CLASH_FILE)]
+        with tempfile.TemporaryDirectory() as tmp:
+            v2ray = Path(tmp) / V2RAY_FILE
+            clash = Path(tmp) / CLASH_FILE
+            self.assertEqual(
+                clash_to_v2ray(FIXTURES / CLASH_FILE, v2ray), len(expected)
+            )
+            self.assertEqual(v2ray_to_clash(v2ray, clash), len(expected))
+            actual = [key_fields(p) for p in iter_clash_proxies(clash)]
+            self.assertEqual(actual, expected)
+
+
+class TestEdgeCases(unittest.TestCase):
+    CLASH = """port: 7890
+proxies: # nodes
+  - {name: a b, server: 1.2.3.4, port: 443, type: trojan, password: x} # one
+  - name: "n #1" # comment
+    type: vless
+    server: 1.2.3.4
+    port: 443 # main
+    uuid: abc
+    network: ws
+    ws-opts: # opts
+      path: /a#b
+  - {name: bad, server: 1.2.3.4, port: 443x, type: trojan, password: x}
+  - {name: obfs, server: 1.2.3.4, port: 8388, type: ss, cipher: a, password: b, plugin: obfs}
+proxy-groups:
+  - name: select
+"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        (self.dir / CLASH_FILE).write_text(self.CLASH, encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_comments(self):
+        proxies = list(iter_clash_proxies(self.dir / CLASH_FILE))
+        self.assertEqual(len(proxies), 4)
+        self.assertEqual(proxies[0]["name"], "a b")
+        self.assertEqual(proxies[1]["name"], "n #1")
+        self.assertEqual(proxies[1]["port"], 443)
+        self.assertEqual(proxies[1]["ws-opts"], {"path": "/a#b"})
+
+    def test_invalid_nodes_skipped(self):
+        proxies = list(iter_clash_proxies(self.dir / CLASH_FILE))
+        self.assertIsNone(clash_to_uri(proxies[2]))
+        self.assertIsNone(clash_to_uri(proxies[3]))
+        uri = "ss://YWVzLTI1Ni1nY206cGFzcw@1.2.3.4:8388/?plugin=obfs-local#x"
+        self.assertIsNone(uri_to_clash(uri))
+
+    def test_malformed_nodes_return_none(self):
+        vmess = "vmess://" + base64.b64encode(b"[1]").decode()
+        self.assertIsNone(uri_to_clash(vmess))
+        base = {"name": "x", "server": "1.2.3.4", "port": 443, "uuid": "u"}
+        bad = [
+            {**base, "type": "vless", "reality-opts": "x"},
+            {**base, "type": "vmess", "network": "ws", "ws-opts": "x"},
+            {**base, "type": "vmess", "network": "ws", "ws-opts": {"headers": 1}},
+            {**base, "type": "vmess", "network": "grpc", "grpc-opts": [1]},
+        ]
+        for proxy in bad:
+            with self.subTest(proxy=proxy):
+                self.assertIsNone(clash_to_uri(proxy))
+
+    def test_duplicate_names(self):
+        (self.dir / V2RAY_FILE).write_text(
+            "trojan://x@1.2.3.4:443#a\n"
+            "trojan://x@1.2.3.5:443#a_2\n"
+            "trojan://x@1.2.3.6:443#a\n",
+            encoding="utf-8",
+        )
+        self.assertEqual(
+            v2ray_to_clash(self.dir / V2RAY_FILE, self.dir / CLASH_FILE), 3
+        )
+        names = [p["name"] for p in iter_clash_proxies(self.dir / CLASH_FILE)]
+        self.assertEqual(names, ["a", "a_2", "a_3"])
+
+    def test_provided_file_kept(self):
+        (self.dir / V2RAY_FILE).write_text("not a subscription", encoding="utf-8")
+        self.assertEqual(convert_site(self.dir, {CLASH_FILE, V2RAY_FILE}), [])
+        self.assertEqual((self.dir / CLASH_FILE).read_text(), self.CLASH)
+
+        (self.dir / V2RAY_FILE).write_text("\n", encoding="utf-8")
+        self.assertEqual(convert_site(self.dir, {CLASH_FILE, V2RAY_FILE}), [V2RAY_FILE])
+        self.assertEqual((self.dir / CLASH_FILE).read_text(), self.CLASH)
+        self.assertEqual(len(list(iter_v2ray_uris(self.dir / V2RAY_FILE))), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import main
+
+# 不存在的路径：统计只保存在内存中
+NO_FILE = Path(__file__).resolve().parent / "missing" / "proxy_stats.json"
+
+
+def pool(source: str, size: int) -> list[str]:
+    return [f"socks5h://{source}-{i}:1080" for i in range(size)]
+
+
+class TestProxySourceStats(unittest.TestCase):
+    def setUp(self):
+        self.stats = main.ProxySourceStats(NO_FILE)
+
+    def test_allocate_budget_and_floor(self):
+        pools = {"a": pool("a", 5000), "b": pool("b", 5000), "c": pool("c", 5000)}
+        self.stats.data["a"] = {"tested": 1000, "alive": 0, "updated": time.time()}
+        sizes = self.stats.allocate(pools, 3000)
+        self.assertEqual(sum(sizes.values()), 3000)
+        for source in pools:
+            self.assertGreaterEqual(sizes[source], main.PROXY_SAMPLE_MIN)
+
+    def test_allocate_capped_by_pool(self):
+        pools = {"small": pool("small", 30), "mid": pool("mid", 500)}
+        sizes = self.stats.allocate(pools, 3000)
+        self.assertEqual(sizes, {"small": 30, "mid": 500})
+
+        pools["big"] = pool("big", 5000)
+        sizes = self.stats.allocate(pools, 3000)
+        self.assertEqual(sizes["small"], 30)
+        self.assertLessEqual(sizes["mid"], 500)
+        self.assertEqual(sum(sizes.values()), 3000)
+
+    def test_latency_prior_for_unknown_source(self):
+        now = time.time()
+        self.stats.data = {
+            "fast": {"tested": 100, "alive": 50, "latency": 1.0, "updated": now},
+            "slow": {"tested": 100, "alive": 50, "latency": 3.0, "updated": now},
+            "dead": {"tested": 100, "alive": 0, "updated": now},
+        }
+        self.assertEqual(self.stats.latency_prior(), 2.0)
+        with mock.patch("main.random.betavariate", return_value=0.5):
+            self.assertEqual(self.stats.weight("fast"), 0.25)
+            self.assertAlmostEqual(self.stats.weight("unknown"), 0.5 / 3)
+            self.assertAlmostEqual(self.stats.weight("dead"), 0.5 / 3)
+
+    def test_update_source_keeps_latency_unknown(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            stats = main.ProxySourceStats(Path(tmp) / "proxy_stats.json")
+            stats.update_source("dead", 10, [])
+            stats.update_source("fast", 10, [1.0, 2.0, 3.0])
+            stats.save()
+            loaded = main.ProxySourceStats(stats.stats_file)
+        self.assertNotIn("latency", loaded.data["dead"])
+        self.assertEqual(loaded.data["fast"]["latency"], 2.0)
+        self.assertEqual(loaded.data["fast"]["alive"], 3)
+
+
+def proxy_index(proxy: str) -> int:
+    return int(proxy.rsplit("-", 1)[-1].split(":")[0])
+
+
+class TestCheckProxy(unittest.TestCase):
+    """替换三级检测函数，只验证漏斗调度"""
+
+    def run_check(self, proxies, tcp, socks5, http):
+        latencies: dict[str, float | None] = {}
+        with (
+            mock.patch("main.test_proxy_tcp", side_effect=tcp),
+            mock.patch("main.test_proxy_socks5", side_effect=socks5),
+            mock.patch("main.timed_proxy_head", side_effect=http),
+            self.assertLogs(level="INFO") as logs,
+        ):
+            available = main.check_proxy(proxies, latencies)
+        # 回调中的异常（如停止后仍向已关闭的线程池提交）只会被记录为 ERROR
+        self.assertFalse([m for m in logs.output if m.startswith("ERROR")])
+        stages = [m for m in logs.output if "Proxy check stage" in m]
+        return available, latencies, stages
+
+    def test_stage_counts(self):
+        proxies = pool("p", 40)
+        available, latencies, stages = self.run_check(
+            proxies,
+            tcp=lambda p, t: proxy_index(p) % 2 == 0,
+            socks5=lambda p, t: proxy_index(p) % 4 == 0,
+            http=lambda url, p, t: 0.1 if proxy_index(p) % 8 == 0 else None,
+        )
+        self.assertEqual(len(latencies), 40)
+        self.assertEqual(sorted(available), sorted(proxies[::8]))
+        self.assertIn("stage tcp: 20 / 40 passed", stages[0])
+        self.assertIn("stage socks5: 10 / 20 passed", stages[1])
+        self.assertIn("stage http: 5 / 10 passed", stages[2])
+
+    def test_stops_at_max_available(self):
+        with mock.patch("main.MAX_AVAILABLE_PROXIES", 5):
+            available, latencies, _ = self.run_check(
+                pool("p", 2000),
+                tcp=lambda p, t: True,
+                socks5=lambda p, t: True,
+                http=lambda url, p, t: 0.1,
+            )
+        self.assertEqual(len(available), 5)
+        self.assertLess(len(latencies), 2000)
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+class TestGetProxyList(unittest.TestCase):
+    def test_shared_proxy_credited_to_every_source(self):
+        lists = {"a.txt": "1.1.1.1:1080\n2.2.2.2:1080\n", "b.txt": "2.2.2.2:1080\n"}
+
+        def fake_get(url, timeout):
+            return FakeResponse(lists[url.rsplit("/", 1)[-1]])
+
+        def fake_check(proxies, latencies, test_url):
+            self.assertEqual(len(proxies), 2)
+            latencies.update({p: 1.0 for p in proxies})
+            return proxies
+
+        stats = main.ProxySourceStats(NO_FILE)
+        with (
+            mock.patch("main.PROXY_URLS", list(lists)),
+            mock.patch("main.requests.get", side_effect=fake_get),
+            mock.patch("main.check_proxy", side_effect=fake_check),
+            mock.patch.object(stats, "save"),
+        ):
+            main.get_proxy_list(stats)
+        self.assertEqual(stats.data["a.txt"]["tested"], 2)
+        self.assertEqual(stats.data["b.txt"]["tested"], 1)
+        self.assertEqual(stats.data["b.txt"]["alive"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
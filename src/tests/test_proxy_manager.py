@@ -0,0 +1,132 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from collectors.base import DirectRecord, ProxyManager
+
+HOST = "example.com"
+URL = f"http://{HOST}/index.html"
+# 不存在的路径：记录只保存在内存中
+NO_FILE = Path(__file__).resolve().parent / "missing" / "direct_stats.json"
+
+
+class FakeResponse:
+    text = "ok"
+
+
+class StubManager(ProxyManager):
+    """用可控的 _request 替换真实网络请求"""
+
+    DIRECT_DELAY = 0.2
+
+    def __init__(self, direct, proxies=("p1",), record=None):
+        super().__init__(list(proxies), direct_record=record or DirectRecord(NO_FILE))
+        self.direct = direct
+        self.calls: list[str] = []
+
+    def _request(self, url, proxy, timeout=30):
+        self.calls.append(proxy or "")
+        if not proxy:
+            return self.direct()
+        return FakeResponse()
+
+
+def direct_ok():
+    return FakeResponse()
+
+
+def direct_fail():
+    raise OSError("blocked")
+
+
+class TestDirectFirst(unittest.TestCase):
+    def test_direct_wins_within_delay(self):
+        manager = StubManager(direct_ok)
+        manager.fetch_html(URL)
+        manager.shutdown()
+        self.assertEqual(manager.calls, [""])
+        entry = manager.direct_record.data[HOST]
+        self.assertEqual(entry["failures"], 0)
+        self.assertIn("latency", entry)
+
+    def test_direct_fails_fast(self):
+        manager = StubManager(direct_fail)
+        start = time.time()
+        manager.fetch_html(URL)
+        elapsed = time.time() - start
+        manager.shutdown()
+        self.assertEqual(manager.calls, ["", "p1"])
+        self.assertLess(elapsed, manager.DIRECT_DELAY)
+        self.assertEqual(manager.direct_record.data[HOST]["failures"], 1)
+        self.assertEqual(manager.affinity[HOST], "p1")
+
+    def test_proxy_wins_while_direct_pending(self):
+        for late in (direct_ok, direct_fail):
+            with self.subTest(late=late.__name__):
+                release = threading.Event()
+
+                def direct():
+                    release.wait(5)
+                    return late()
+
+                manager = StubManager(direct)
+                manager.fetch_html(URL)
+                self.assertEqual(manager.direct_record.data[HOST]["failures"], 1)
+                release.set()
+                manager.shutdown()
+                entry = manager.direct_record.data[HOST]
+                self.assertEqual(entry["failures"], 1)
+                self.assertNotIn("latency", entry)
+
+    def test_skips_direct_after_max_failures(self):
+        manager = StubManager(direct_fail)
+        for _ in range(manager.DIRECT_MAX_FAILURES):
+            manager.affinity.clear()
+            manager.fetch_html(URL)
+        manager.affinity.clear()
+        manager.calls.clear()
+        manager.fetch_html(URL)
+        manager.shutdown()
+        self.assertEqual(manager.calls, ["p1"])
+
+    def test_direct_disabled(self):
+        manager = StubManager(direct_ok)
+        manager.direct_first = False
+        manager.fetch_html(URL)
+        manager.shutdown()
+        self.assertEqual(manager.calls, ["p1"])
+
+
+class TestDirectRecord(unittest.TestCase):
+    def test_gating_and_retry(self):
+        record = DirectRecord(NO_FILE)
+        record.update(HOST, False)
+        self.assertTrue(record.allowed(HOST, 2, 3600))
+        record.update(HOST, False)
+        self.assertFalse(record.allowed(HOST, 2, 3600))
+        with mock.patch("collectors.base.time.time", return_value=time.time() + 3600):
+            self.assertTrue(record.allowed(HOST, 2, 3600))
+        record.update(HOST, True, 0.4)
+        self.assertTrue(record.allowed(HOST, 2, 3600))
+        self.assertEqual(record.data[HOST]["failures"], 0)
+        self.assertAlmostEqual(record.latency(HOST), 0.4)
+
+    def test_persisted_across_runs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "direct_stats.json"
+            record = DirectRecord(path)
+            record.update(HOST, False)
+            record.update(HOST, False)
+            record.save()
+
+            manager = StubManager(direct_ok, record=DirectRecord(path))
+            manager.fetch_html(URL)
+            manager.shutdown()
+            self.assertEqual(manager.calls, ["p1"])
+
+
+if __name__ == "__main__":
+    unittest.main()